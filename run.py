@@ -26,7 +26,11 @@ from server.agents.engine import agent_engine
 processes = {}
 stop_event = multiprocessing.Event()
 
-def start_process(name, target_func, args=(), kwargs={}):
+# Warehouse API 的 worker 数量；UID跟踪状态保存在 MongoDB 中，多个 worker 之间共享
+# Server API 会在启动时运行 agent，只能保持单进程
+WAREHOUSE_WORKERS = int(os.getenv("WAREHOUSE_WORKERS", "1"))
+
+def start_process(name, target_func, args=(), kwargs={}, daemon=True):
     """启动子进程并返回其进程对象"""
     logger.info(f"启动 {name}...")
     
@@ -34,7 +38,7 @@ def start_process(name, target_func, args=(), kwargs={}):
         target=target_func,
         args=args,
         kwargs=kwargs,
-        daemon=True
+        daemon=daemon
     )
     
     process.start()
@@ -71,11 +75,28 @@ def start_server_api():
 def start_warehouse_api():
     """启动Warehouse API服务器"""
     import uvicorn
+    
+    if WAREHOUSE_WORKERS > 1:
+        # 多 worker 模式需要以导入字符串的方式传入应用
+        uvicorn.run("warehouse.api:app", host="0.0.0.0", port=8000, workers=WAREHOUSE_WORKERS)
+        return
+    
     from warehouse.api import app
     
     # 启动API服务器
     uvicorn.run(app, host="0.0.0.0", port=8000)
 
+def start_warehouse_process():
+    """启动Warehouse API子进程
+    
+    守护进程不能再创建子进程，多 worker 模式下以非守护进程启动
+    """
+    return start_process(
+        "warehouse_api",
+        target_func=start_warehouse_api,
+        daemon=WAREHOUSE_WORKERS <= 1
+    )
+
 def main():
     """主函数，启动所有组件"""
     # 注册信号处理器
@@ -91,10 +112,7 @@ def main():
     logger.info("由server/api服务管理agent启动...")
     
     # 启动Warehouse API服务器
-    warehouse_api = start_process(
-        "warehouse_api",
-        target_func=start_warehouse_api
-    )
+    warehouse_api = start_warehouse_process()
     
     # 启动Server API服务器
     server_api = start_process(
@@ -112,12 +130,13 @@ def main():
                 if not process.is_alive():
                     logger.warning(f"{name} 意外退出，尝试重新启动...")
                     
+                    # 先移除已退出的进程，重启后的新进程会重新登记，stop_all_processes 才能终止它
+                    del processes[name]
+                    
                     if name == "warehouse_api":
-                        start_process("warehouse_api", start_warehouse_api)
+                        start_warehouse_process()
                     elif name == "server_api":
                         start_process("server_api", start_server_api)
-                    
-                    del processes[name]
             
             time.sleep(1)
             
@@ -12,9 +12,12 @@ from pathlib import Path
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger('text2v')
 
+# 根目录下 .env 文件的路径，导入时计算一次
+_ENV_PATH = Path(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))) / '.env'
+
 # 直接从根目录下的 .env 文件读取配置
 def load_env_from_file():
-    env_path = Path(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), '.env'))
+    env_path = _ENV_PATH
     if not env_path.exists():
         logger.error(f"Error: .env file not found at {env_path}")
         return {}
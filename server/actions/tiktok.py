@@ -9,24 +9,40 @@ from typing import Dict, Any, Optional, Tuple, List
 from dotenv import load_dotenv, set_key
 from pathlib import Path
 from datetime import datetime, timedelta
-from pymongo import MongoClient, DESCENDING
+from pymongo import DESCENDING
+
+from warehouse.storage.mongodb.connector import get_client
 
 # Load environment variables
 load_dotenv()
 
+# 根目录下 .env 文件的路径，导入时计算一次
+_ENV_PATH = Path(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))) / '.env'
+
+# Cached tiktok_tokens collection, created on first use and reused afterwards
+_token_collection = None
+
 # MongoDB connection
 def get_mongo_connection():
     """
     Get MongoDB connection for TikTok token storage
     
+    The client is created and the indexes are checked only once per process;
+    later calls return the cached collection.
+    
     Returns:
         MongoDB collection for tiktok_tokens
     """
+    global _token_collection
+    if _token_collection is not None:
+        return _token_collection
+    
     connection_string = os.getenv('MONGODB_CONNECTION_STRING')
     if not connection_string:
         raise ValueError("MongoDB connection string not found in environment variables")
     
-    client = MongoClient(connection_string)
+    # Reuse the process-wide pooled client instead of opening another pool
+    client = get_client(connection_string)
     db_name = os.getenv('MONGODB_DATABASE', 'degenpy')
     db = client[db_name]
     collection = db['tiktok_tokens']
@@ -53,6 +69,7 @@ def get_mongo_connection():
     except Exception as e:
         print(f"Warning: Failed to create indexes: {e}")
     
+    _token_collection = collection
     return collection
 
 def get_tiktok_token():
@@ -63,7 +80,7 @@ def get_tiktok_token():
         包含令牌数据和获取时间戳的字典，如果失败则返回 None
     """
     # 直接从 .env 文件读取凭证
-    env_path = Path(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), '.env'))
+    env_path = _ENV_PATH
     if not env_path.exists():
         print(f"Error: .env file not found at {env_path}")
         return None
@@ -149,7 +166,7 @@ def process_token_response(response_str):
         expires_at = acquired_at + expires_in
         
         # Get path to .env file
-        env_path = Path(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))) / '.env'
+        env_path = _ENV_PATH
         
         # Save token data to .env file
         set_key(env_path, 'TIKTOK_ACCESS_TOKEN', token_data.get('access_token', ''))
@@ -3,6 +3,7 @@
 
 import os
 import json
+import time
 import requests
 import logging
 from typing import Dict, Any, Optional
@@ -16,6 +17,9 @@ load_dotenv()
 # 配置日志
 logger = logging.getLogger("webhook_action")
 
+# Webhook request headers, identical for every notification
+WEBHOOK_HEADERS = {"Content-Type": "application/json"}
+
 class WebhookNotifier:
     """
     Send notifications to webhook endpoints
@@ -45,7 +49,7 @@ class WebhookNotifier:
             # Prepare the payload
             payload = {
                 "event_type": event_type,
-                "timestamp": int(__import__("time").time()),
+                "timestamp": int(time.time()),
                 "data": data
             }
             
@@ -53,7 +57,7 @@ class WebhookNotifier:
             response = requests.post(
                 self.webhook_url,
                 json=payload,
-                headers={"Content-Type": "application/json"}
+                headers=WEBHOOK_HEADERS
             )
             
             if response.status_code >= 200 and response.status_code < 300:
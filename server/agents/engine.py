@@ -59,12 +59,17 @@ class AgentEngine:
             
         # 执行agent的所有任务
         for task_file in agent_config.get('tasks', []):
-            self._run_task(task_file)
+            self._run_task(task_file, agent_name)
             
         return True
         
-    def _run_task(self, task_file):
-        """运行指定的任务"""
+    def _run_task(self, task_file, agent_name=None):
+        """运行指定的任务
+        
+        Args:
+            task_file: 任务配置文件路径（相对于tasks目录）
+            agent_name: 任务所属的agent，未提供时在已加载的agent中查找
+        """
         task_path = self.tasks_dir / task_file
         
         if not task_path.exists():
@@ -80,14 +85,14 @@ class AgentEngine:
                 logger.error(f"任务配置缺少id: {task_path}")
                 return False
                 
-            # 获取当前agent配置
-            agent_name = None
-            for name, config in self.agents.items():
-                if task_file in config.get('tasks', []):
-                    agent_name = name
-                    break
+            # 获取当前agent配置，调用方已知agent时无需遍历所有agent
+            if agent_name is None:
+                for name, config in self.agents.items():
+                    if task_file in config.get('tasks', []):
+                        agent_name = name
+                        break
                     
-            if not agent_name:
+            if not agent_name or agent_name not in self.agents:
                 logger.error(f"无法确定任务所属的agent: {task_file}")
                 return False
                 
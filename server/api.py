@@ -2,24 +2,22 @@
 # -*- coding: utf-8 -*-
 
 import os
-import json
-import time
-import uuid
+import orjson
 import logging
 import requests
 import urllib.parse
-from typing import Dict, Any, List, Optional
+from typing import Annotated, Dict, Any, Optional
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Path
+from fastapi import Response as HTTPResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
+import uvicorn
 
 # 加载环境变量
 load_dotenv()
 
-
-# 导入 warehouse API 功能
-from warehouse.api import app as warehouse_app
-from warehouse.storage import get_db_connector
 # 导入 agent 引擎
 from server.agents.engine import agent_engine
 
@@ -30,43 +28,53 @@ logging.basicConfig(
 )
 logger = logging.getLogger("api")
 
-# Load environment variables
-load_dotenv()
+app = FastAPI(
+    title="DegenPy Server API",
+    description="Agent and trigger management API",
+    default_response_class=ORJSONResponse
+)
 
-app = FastAPI(title="DegenPy Server API", description="Agent and trigger management API")
+# 压缩较大的JSON响应；compresslevel=5 在压缩率和CPU开销之间折中
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 
 # Warehouse API 配置
 WAREHOUSE_API_URL = os.getenv("WAREHOUSE_API_URL", "http://localhost:8000")
 
-class AgentConfig(BaseModel):
-    name: str
-    description: str
-    personality: Dict[str, Any]
-    triggers: List[str]
-
-class TriggerRule(BaseModel):
-    id: str
-    name: str
-    description: str
-    schedule: str
-    data_source: str
-    conditions: Dict[str, Any]
-    actions: List[str]
+# 路径中的ID只允许字母、数字、下划线和连字符，在解析阶段拒绝非法输入（含路径穿越）
+ConfigId = Annotated[str, Path(min_length=1, max_length=64, pattern=r"^[A-Za-z0-9_-]+$")]
 
 class Response(BaseModel):
     status: str
     message: str
     data: Optional[dict] = None
 
-class Agent(BaseModel):
-    name: str
-    description: str
-    personality: Dict[str, Any]
-    tasks: List[str]
-    output_format: Dict[str, Any]
+# Agent配置缓存：文件路径 -> (st_mtime_ns, 配置字典)
+_agent_config_cache = {}
 
-# In-memory storage for scheduled jobs
-scheduled_jobs = {}
+def _load_agent_config(agent_file: str) -> Dict[str, Any]:
+    """读取agent配置文件
+    
+    以文件修改时间为键缓存解析结果，文件未变化时只需一次stat调用
+    
+    Args:
+        agent_file: agent配置文件路径
+        
+    Returns:
+        agent配置字典
+        
+    Raises:
+        FileNotFoundError: 配置文件不存在
+    """
+    mtime_ns = os.stat(agent_file).st_mtime_ns
+    cached = _agent_config_cache.get(agent_file)
+    if cached and cached[0] == mtime_ns:
+        return cached[1]
+    
+    with open(agent_file, "rb") as f:
+        agent_data = orjson.loads(f.read())
+    
+    _agent_config_cache[agent_file] = (mtime_ns, agent_data)
+    return agent_data
 
 @app.get("/")
 async def root():
@@ -87,35 +95,52 @@ async def root():
     # 返回完整的URL
     return f'https://www.tiktok.com/v2/auth/authorize/?{query_str}'
 
+# /agents 响应体缓存：(文件名, st_mtime_ns) 元组 -> 序列化后的JSON字节
+_agents_body_cache = (None, b"")
+
 @app.get("/agents")
-async def list_agents():
-    """List all available agents"""
+def list_agents():
+    """List all available agents
+    
+    The serialized response body is cached and reused until an agent file is
+    added, removed or modified.
+    """
+    global _agents_body_cache
     try:
         agents_dir = "server/agents"
-        agents = []
         
-        for filename in os.listdir(agents_dir):
-            if filename.endswith(".json"):
-                with open(os.path.join(agents_dir, filename), "r", encoding="utf-8") as f:
-                    agent_data = json.load(f)
-                    agents.append({
-                        "id": filename.replace(".json", ""),
-                        "name": agent_data.get("name", "Unnamed Agent"),
-                        "description": agent_data.get("description", "")
-                    })
+        with os.scandir(agents_dir) as entries:
+            agent_files = tuple(
+                (entry.name, entry.stat().st_mtime_ns)
+                for entry in entries
+                if entry.name.endswith(".json")
+            )
+        
+        cached_key, cached_body = _agents_body_cache
+        if cached_key != agent_files:
+            agents = []
+            for filename, _ in agent_files:
+                agent_data = _load_agent_config(os.path.join(agents_dir, filename))
+                agents.append({
+                    "id": filename.replace(".json", ""),
+                    "name": agent_data.get("name", "Unnamed Agent"),
+                    "description": agent_data.get("description", "")
+                })
+            
+            response = Response(status="success", message=f"Found {len(agents)} agents", data={"agents": agents})
+            cached_body = orjson.dumps(response.model_dump())
+            _agents_body_cache = (agent_files, cached_body)
                     
-        return Response(status="success", message=f"Found {len(agents)} agents", data={"agents": agents})
+        return HTTPResponse(content=cached_body, media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/agents/{agent_id}")
-async def get_agent(agent_id: str):
+def get_agent(agent_id: ConfigId):
     """Get agent details by ID"""
     try:
         agent_file = f"server/agents/{agent_id}.json"
-        
-        with open(agent_file, "r", encoding="utf-8") as f:
-            agent_data = json.load(f)
+        agent_data = _load_agent_config(agent_file)
             
         return Response(status="success", message=f"Agent found", data={"agent": agent_data})
     except FileNotFoundError:
@@ -124,7 +149,7 @@ async def get_agent(agent_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/tasks")
-async def list_tasks():
+def list_tasks():
     """List all available tasks"""
     try:
         tasks_dir = "tasks"
@@ -133,8 +158,8 @@ async def list_tasks():
         # 只检查根目录下的任务文件
         for filename in os.listdir(tasks_dir):
             if filename.endswith(".json") and os.path.isfile(os.path.join(tasks_dir, filename)):
-                with open(os.path.join(tasks_dir, filename), "r", encoding="utf-8") as f:
-                    task_data = json.load(f)
+                with open(os.path.join(tasks_dir, filename), "rb") as f:
+                    task_data = orjson.loads(f.read())
                     tasks.append({
                         "id": task_data.get("id", os.path.splitext(filename)[0]),
                         "name": task_data.get("name", "Unnamed Task"),
@@ -147,7 +172,7 @@ async def list_tasks():
         raise HTTPException(status_code=500, detail=f"Error listing tasks: {str(e)}")
 
 @app.get("/tasks/{task_id}")
-async def get_task(task_id: str):
+def get_task(task_id: ConfigId):
     """Get task details by ID"""
     try:
         # 直接在tasks根目录下查找任务文件
@@ -156,8 +181,8 @@ async def get_task(task_id: str):
         if not os.path.exists(task_file):
             raise FileNotFoundError(f"Task {task_id} not found")
         
-        with open(task_file, "r", encoding="utf-8") as f:
-            task_data = json.load(f)
+        with open(task_file, "rb") as f:
+            task_data = orjson.loads(f.read())
             
         return Response(status="success", message=f"Task found", data={"task": task_data})
     except FileNotFoundError:
@@ -167,8 +192,11 @@ async def get_task(task_id: str):
 
 
 @app.get("/content/{content_id}")
-async def get_content(content_id: str):
-    """获取指定ID的内容"""
+def get_content(content_id: str):
+    """获取指定ID的内容
+    
+    requests为阻塞调用，定义为普通函数由FastAPI放到线程池执行，避免阻塞事件循环
+    """
     try:
         # 调用warehouse API获取内容
         response = requests.get(f"{WAREHOUSE_API_URL}/content/{content_id}")
@@ -210,7 +238,7 @@ async def startup_event():
         logger.error(f"启动TikTok-agent时出错: {str(e)}")
 
 @app.post("/run-agent/{agent_id}")
-async def run_agent(agent_id: str, background_tasks: BackgroundTasks):
+async def run_agent(agent_id: ConfigId, background_tasks: BackgroundTasks):
     """启动指定的agent"""
     try:
         # 检查agent是否存在
@@ -254,7 +282,7 @@ async def get_running_agents():
         raise HTTPException(status_code=500, detail=f"Error getting running agents: {str(e)}")
 
 @app.post("/stop-agent/{agent_id}")
-async def stop_agent(agent_id: str):
+async def stop_agent(agent_id: ConfigId):
     """停止指定的agent及其所有任务"""
     try:
         # 检查agent是否存在且正在运行
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import json
+import orjson
 import logging
 import asyncio
 import threading
@@ -9,6 +9,7 @@ import time
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 import os
+from operator import itemgetter
 from pathlib import Path
 
 # 配置日志
@@ -19,9 +20,8 @@ logging.basicConfig(
 logger = logging.getLogger("special_attention_task")
 
 # 导入数据库连接器
-from warehouse.api import get_data_by_uids
-from warehouse.storage.mongodb.connector import mongodb_connector
-from warehouse.utils.uid_tracker import uid_tracker
+from warehouse.storage.mongodb.connector import get_connector
+from warehouse.utils.uid_tracker import get_uid_tracker
 
 # 导入视频生成服务
 from server.actions.text2v import create_video
@@ -199,7 +199,7 @@ class SpecialAttentionTask:
                 return None
             
             # 获取MongoDB中的实际集合名称
-            collection_names = mongodb_connector.db.list_collection_names()
+            collection_names = get_connector().db.list_collection_names()
             
             # 使用正确的集合名称（从环境变量获取）
             collection_name = os.getenv('MONGODB_COLLECTION', 'twitterTweets')
@@ -217,26 +217,22 @@ class SpecialAttentionTask:
             logger.info(f"查询条件: {query}")
             
             # 从MongoDB中查询数据，按创建时间降序排序
-            recent_data = list(mongodb_connector.db[collection_name].find(query).sort("createdAt", -1))
+            # 这里只需要_id，完整内容只针对未处理的UID再获取
+            # 直接从游标中提取UID列表，投影保证每条结果都有_id
+            cursor = get_connector().db[collection_name].find(query, {"_id": 1}).sort("createdAt", -1)
+            uids = list(map(itemgetter("_id"), cursor))
             
             # 记录查询结果数量
-            logger.info(f"查询到 {len(recent_data)} 条数据")
-            
-            if not recent_data:
-                logger.info("未找到符合条件的数据")
-                return None
-            
-            # 提取有效的UID列表
-            uids = [item.get("_id") for item in recent_data if "_id" in item and item.get("_id") is not None]
+            logger.info(f"查询到 {len(uids)} 条数据")
             
             if not uids:
-                logger.warning("未找到有效的UID")
+                logger.info("未找到符合条件的数据")
                 return None
                 
             logger.info(f"提取到的UID列表: {uids}")
             
             # 使用UID跟踪器过滤出未处理的UID
-            unprocessed_uids = uid_tracker.get_unprocessed(uids, self.task_id)
+            unprocessed_uids = get_uid_tracker().get_unprocessed(uids, self.task_id)
             logger.info(f"未处理的UID: {unprocessed_uids}")
             
             if not unprocessed_uids:
@@ -245,15 +241,13 @@ class SpecialAttentionTask:
             
             # 获取未处理数据的完整内容
             try:
-                unprocessed_data = mongodb_connector.get_data_by_uids(unprocessed_uids)
+                unprocessed_data = get_connector().get_data_by_uids(unprocessed_uids)
                 if not unprocessed_data:
                     logger.warning("未能获取未处理数据的内容")
                     return None
                     
-                # 标记为已处理
-                for uid in unprocessed_uids:
-                    if uid is not None:  # 确保不添加None作为UID
-                        uid_tracker.add_uid(uid, self.task_id)
+                # 标记为已处理（add_uids会跳过None）
+                get_uid_tracker().add_uids(unprocessed_uids, self.task_id)
                         
                 # 如果unprocessed_data不是列表，将其转换为列表
                 if not isinstance(unprocessed_data, list):
@@ -311,7 +305,7 @@ class SpecialAttentionTask:
             task_name = self.task_config.get('name', '特别关注')
             
             # 将原始数据转换为JSON字符串
-            raw_content_json = json.dumps(raw_data_list, ensure_ascii=False, indent=2)
+            raw_content_json = orjson.dumps(raw_data_list, option=orjson.OPT_INDENT_2).decode()
             
             # 准备突发新闻风格的提示词
             prompt = f"""帮我分析这些推文，是否是币圈发突发：{raw_content_json}。如果是请直接输出新闻报道内容，不要包含任何前缀说明。如果内容不是突发新闻，请在报道开头添加[警告:内容不是突发新闻]标签。
@@ -358,7 +352,7 @@ class SpecialAttentionTask:
                 
                 # 将视频信息保存到MongoDB
                 try:
-                    collection = mongodb_connector.db['video_tasks']
+                    collection = get_connector().db['video_tasks']
                     collection.update_one(
                         {"task_id": self.task_id},
                         {"$set": video_info},
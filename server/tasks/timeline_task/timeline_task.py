@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import json
+import orjson
 import logging
 import asyncio
 import threading
@@ -10,6 +10,7 @@ import uuid
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 import os
+from operator import itemgetter
 from pathlib import Path
 
 # Configure logging
@@ -20,9 +21,8 @@ logging.basicConfig(
 logger = logging.getLogger("timeline_task")
 
 # Import database connectors
-from warehouse.api import get_data_by_uids
-from warehouse.storage.mongodb.connector import mongodb_connector
-from warehouse.utils.uid_tracker import uid_tracker
+from warehouse.storage.mongodb.connector import get_connector
+from warehouse.utils.uid_tracker import get_uid_tracker
 
 # Import video generation service
 from server.actions.text2v import create_video
@@ -204,26 +204,25 @@ class TimelineTask:
             collection_name = os.getenv('MONGODB_COLLECTION', 'twitterTweets')
             
             # 从MongoDB中查询数据，按创建时间降序排序
-            recent_data = list(mongodb_connector.db[collection_name].find(query).sort("createdAt", -1))
+            # Only _id is needed here; full documents are fetched later for unprocessed UIDs only
+            # Extract the UID list straight from the cursor; the projection guarantees _id
+            cursor = get_connector().db[collection_name].find(query, {"_id": 1}).sort("createdAt", -1)
+            uids = list(map(itemgetter("_id"), cursor))
             
-            if not recent_data:
+            if not uids:
                 return None
             
-            # Extract UID list
-            uids = [item.get("_id") for item in recent_data if "_id" in item]
-            
             # Use UID tracker to filter out unprocessed UIDs
-            unprocessed_uids = uid_tracker.get_unprocessed(uids, self.task_id)
+            unprocessed_uids = get_uid_tracker().get_unprocessed(uids, self.task_id)
             
             if not unprocessed_uids:
                 return None
             
             # Get the complete content of unprocessed data
-            unprocessed_data = get_data_by_uids(unprocessed_uids)
+            unprocessed_data = get_connector().get_data_by_uids(unprocessed_uids)
             
             # Mark as processed
-            for uid in unprocessed_uids:
-                uid_tracker.add_uid(uid, self.task_id)
+            get_uid_tracker().add_uids(unprocessed_uids, self.task_id)
             
             return unprocessed_data
             
@@ -254,7 +253,7 @@ class TimelineTask:
                     item["id"] = i + 1
                 
             # Convert dictionary list to JSON string
-            content_json = json.dumps(raw_items, ensure_ascii=False, indent=2)
+            content_json = orjson.dumps(raw_items, option=orjson.OPT_INDENT_2).decode()
             
             # Prepare social media summary style prompt
             prompt = f"""Summarize the following tweet content into a social media hot topic summary, highlighting key viewpoints and public reactions：
@@ -273,7 +272,7 @@ class TimelineTask:
             logger.error(f"AI summary generation exception: {str(e)}")
             # If an exception occurs, try to return the JSON string of the original data
             try:
-                return json.dumps(raw_items, ensure_ascii=False, indent=2)
+                return orjson.dumps(raw_items, option=orjson.OPT_INDENT_2).decode()
             except:
                 return "Error occurred while processing data"
             
@@ -308,7 +307,7 @@ class TimelineTask:
                 
                 # Save video information to MongoDB, using d_id_video_id as a unique identifier
                 try:
-                    collection = mongodb_connector.db['video_tasks']
+                    collection = get_connector().db['video_tasks']
                     collection.update_one(
                         {"d_id_video_id": d_id_video_id},
                         {"$set": video_info},
@@ -334,8 +333,8 @@ class TimelineTask:
                 
                 # Record failure information to database
                 try:
-                    # Note: mongodb_connector is needed here, not self.db
-                    collection = mongodb_connector.db['video_tasks']
+                    # Note: the shared connector is needed here, not self.db
+                    collection = get_connector().db['video_tasks']
                     
                     # If d_id_video_id cannot be obtained (failure case), generate a unique identifier
                     # This ensures that error records will not overwrite existing records
@@ -14,7 +14,7 @@ from pymongo import MongoClient, DESCENDING
 from pymongo.errors import PyMongoError
 
 # Import MongoDB connector
-from warehouse.storage.mongodb.connector import mongodb_connector
+from warehouse.storage.mongodb.connector import get_connector
 
 # Import D-ID API functions
 from server.actions.text2v import get_video_status
@@ -41,6 +41,17 @@ class VideoTaskMonitor:
         self.max_check_attempts = 30  # Maximum number of check attempts
         self.running = False
         self.poll_thread = None
+        self._ensure_indexes()
+    
+    def _ensure_indexes(self):
+        """Ensure the index used by the pending-task poll exists"""
+        try:
+            collection = get_connector().db['video_tasks']
+            # Matches the status filter plus the created_at sort in _get_pending_tasks,
+            # so the poll is a pure index scan without an in-memory SORT stage
+            collection.create_index([("status", 1), ("created_at", DESCENDING)])
+        except PyMongoError as e:
+            logger.warning(f"Failed to create video_tasks index: {str(e)}")
     
     def start(self) -> Dict[str, Any]:
         """Execute task monitoring
@@ -148,14 +159,15 @@ class VideoTaskMonitor:
             List of tasks that need updating
         """
         try:
-            collection = mongodb_connector.db['video_tasks']
+            collection = get_connector().db['video_tasks']
             
             # Query condition: only get tasks with 'created' and 'started' status
             query = {
                 "status": {"$in": ["created", "started"]}
             }
             
-            # Sort by creation time, prioritize processing earlier tasks
+            # Sort by creation time. Not by _id: video records are upserted by
+            # task_id, so a new video reuses the document and its _id
             tasks = list(collection.find(query).sort("created_at", DESCENDING))
             
             logger.info(f"Found {len(tasks)} video tasks that need status updates")
@@ -219,7 +231,7 @@ class VideoTaskMonitor:
                 update_data["error"] = api_result["error"]
             
             # Update task status in MongoDB, using d_id_video_id as the primary key
-            collection = mongodb_connector.db['video_tasks']
+            collection = get_connector().db['video_tasks']
             collection.update_one(
                 {"d_id_video_id": d_id_video_id},
                 {"$set": update_data}
@@ -2,25 +2,62 @@
 # -*- coding: utf-8 -*-
 
 import os
-import json
+import orjson
 import time
 import uuid
+import asyncio
 import threading
+import functools
+import logging
+import tempfile
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Union, Any
-from fastapi import FastAPI, HTTPException, Query, Depends
-from pydantic import BaseModel, RootModel
+from fastapi import FastAPI, HTTPException, Query, Depends, Request
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from fastapi import Response as HTTPResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
 import uvicorn
 from dotenv import load_dotenv
 from pathlib import Path
 
 # 导入数据库连接器
-from warehouse.storage.mongodb.connector import MongoDBConnector
+from warehouse.storage.mongodb.connector import get_connector
+from warehouse.storage.mongodb.async_connector import AsyncMongoDBConnector
+from warehouse.storage.mongodb.documents import DUPLICATE_KEY_ERROR
 
 # Load environment variables
 load_dotenv()
 
-app = FastAPI(title="DegenPy Warehouse API", description="Data warehouse API for DegenPy")
+app = FastAPI(
+    title="DegenPy Warehouse API",
+    description="Data warehouse API for DegenPy",
+    default_response_class=ORJSONResponse
+)
+
+# 压缩较大的JSON响应；compresslevel=5 在压缩率和CPU开销之间折中
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+logger = logging.getLogger("warehouse_api")
+
+@app.exception_handler(StarletteHTTPException)
+async def http_exception_handler(request: Request, exc: StarletteHTTPException):
+    """以统一的 status/message 结构返回HTTP错误"""
+    return ORJSONResponse(
+        {"status": "error", "message": str(exc.detail)},
+        status_code=exc.status_code,
+        headers=getattr(exc, "headers", None)
+    )
+
+@app.exception_handler(Exception)
+async def unhandled_exception_handler(request: Request, exc: Exception):
+    """记录未处理的异常并返回500"""
+    logger.exception(f"处理请求 {request.method} {request.url.path} 时出错")
+    return ORJSONResponse(
+        {"status": "error", "message": str(exc)},
+        status_code=500
+    )
 
 # 配置文件路径
 CONFIG_DIR = os.path.join(os.path.dirname(__file__), 'config')
@@ -31,26 +68,36 @@ os.makedirs(CONFIG_DIR, exist_ok=True)
 
 class WarehouseAPI:
     def __init__(self):
-        self.connector = MongoDBConnector()
+        self.connector = get_connector()
 
 # 导入UID跟踪器
-from warehouse.utils.uid_tracker import uid_tracker
+from warehouse.utils.uid_tracker import get_uid_tracker
 
 # 用于API服务的任务ID
 API_TASK_ID = "warehouse_api"
 
+def _track_uids(uids):
+    """在工作线程中记录已存储的UID（第一次调用时才创建跟踪器）"""
+    get_uid_tracker().add_uids(uids, API_TASK_ID)
+
 class ContentData(BaseModel):
     content: Dict[str, Any]
     time: Optional[str] = None
 
-class StoreItem(BaseModel):
-    content: Dict[str, Any]  # 存储内容的字典
-    tags: Optional[List[str]] = None  # 可选的标签数组
-    uid: Optional[str] = None  # 如果不提供将自动生成 UUID
-
-# 使用 RootModel 来创建一个直接接受列表的模型
-class StoreRequest(RootModel):
-    root: List[StoreItem]
+# /data 请求体的 OpenAPI 描述
+# 请求体由 orjson 直接解析，只校验外层结构，content 字典内部不做校验
+STORE_REQUEST_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "required": ["content"],
+        "properties": {
+            "content": {"type": "object", "description": "存储内容的字典"},
+            "tags": {"type": "array", "items": {"type": "string"}, "description": "可选的标签数组"},
+            "uid": {"type": "string", "description": "如果不提供将自动生成 UUID"}
+        }
+    }
+}
 
 class Response(BaseModel):
     status: str
@@ -60,49 +107,163 @@ class Response(BaseModel):
 class TagsConfig(BaseModel):
     special_tags: List[str]
 
+@functools.lru_cache(maxsize=1)
 def get_db_manager():
-    """获取数据库管理器"""
+    """获取数据库管理器
+    
+    进程内只创建一个实例，避免每个请求都重新构造连接器和MongoClient
+    """
     return WarehouseAPI()
 
+# 异步连接器，在应用启动时创建，关闭时释放
+async_connector: Optional[AsyncMongoDBConnector] = None
+
+@app.on_event("startup")
+async def startup_event():
+    """创建异步MongoDB连接器"""
+    global async_connector
+    async_connector = AsyncMongoDBConnector()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """关闭异步MongoDB连接器"""
+    global async_connector
+    if async_connector is not None:
+        async_connector.close()
+        async_connector = None
+
+def get_async_connector() -> AsyncMongoDBConnector:
+    """获取异步数据库连接器（用于依赖注入）"""
+    return async_connector
+
+# 根路径的响应内容固定，启动时序列化一次
+_ROOT_BODY = orjson.dumps({"status": "ok", "message": "DegenPy Warehouse API is running"})
+
 @app.get("/")
 async def root():
     """API根路径"""
-    return {"status": "ok", "message": "DegenPy Warehouse API is running"}
+    return HTTPResponse(content=_ROOT_BODY, media_type="application/json")
+
+# 标签配置缓存：以文件的 st_mtime_ns 为键，文件未变化时不再重新读取和解析
+# body 为 GET /tags 序列化后的响应体，随配置一起更新
+_tags_cache = {"mtime_ns": -1, "data": None, "body": b""}
+_tags_cache_lock = threading.Lock()
+
+def _tags_response_body(config: dict) -> bytes:
+    """序列化 GET /tags 的成功响应"""
+    return orjson.dumps({"status": "success", "message": "获取标签列表成功", "data": config})
+
+def _write_tags_config(config: dict):
+    """原子写入标签配置文件
+    
+    先写入同目录下的临时文件并fsync，再用os.replace替换，避免并发读取到写了一半的文件；
+    每次写入使用独立的临时文件名，多个worker同时写入时不会互相覆盖
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=CONFIG_DIR, prefix="tags.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            # mkstemp创建的文件权限为0600，替换后会成为配置文件，恢复为普通的0644
+            os.fchmod(f.fileno(), 0o644)
+            f.write(orjson.dumps(config, option=orjson.OPT_INDENT_2))
+            f.flush()
+            os.fsync(f.fileno())
+            # 取临时文件自身的修改时间：替换后它就是配置文件，replace之后再stat可能拿到其他worker写入的文件
+            mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+        os.replace(tmp_path, TAGS_CONFIG_PATH)
+    except BaseException:
+        # 写入或替换失败时清理临时文件
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    
+    # 同步更新缓存，下次读取无需重新解析
+    with _tags_cache_lock:
+        _tags_cache["mtime_ns"] = mtime_ns
+        _tags_cache["data"] = config
+        _tags_cache["body"] = _tags_response_body(config)
+
+def _refresh_tags_cache(st: os.stat_result):
+    """文件修改时间变化时重新读取标签配置（调用方需持有 _tags_cache_lock）
+    
+    Args:
+        st: 标签配置文件的stat结果
+    """
+    if _tags_cache["mtime_ns"] == st.st_mtime_ns:
+        return
+    
+    with open(TAGS_CONFIG_PATH, 'rb') as f:
+        config = orjson.loads(f.read())
+    _tags_cache["mtime_ns"] = st.st_mtime_ns
+    _tags_cache["data"] = config
+    _tags_cache["body"] = _tags_response_body(config)
+
+def _load_tags_cached(st: os.stat_result) -> dict:
+    """读取标签配置，文件修改时间未变化时直接返回缓存
+    
+    Args:
+        st: 标签配置文件的stat结果
+        
+    Returns:
+        标签配置字典
+    """
+    with _tags_cache_lock:
+        _refresh_tags_cache(st)
+        return _tags_cache["data"]
+
+def _load_tags_body_cached(st: os.stat_result) -> bytes:
+    """获取缓存的 GET /tags 响应体
+    
+    Args:
+        st: 标签配置文件的stat结果
+        
+    Returns:
+        序列化后的响应体
+    """
+    with _tags_cache_lock:
+        _refresh_tags_cache(st)
+        return _tags_cache["body"]
+
+def _tags_etag(st: os.stat_result) -> str:
+    """根据标签配置文件的修改时间和大小生成弱ETag"""
+    return f'W/"{st.st_mtime_ns:x}-{st.st_size:x}"'
 
 @app.get("/tags")
-async def get_tags():
+def get_tags(request: Request):
     """获取特别关注的标签列表
     
+    支持If-None-Match，配置文件未变化时直接返回304；
+    否则返回缓存的序列化响应体，只需一次stat调用
+    
     Returns:
         包含状态、消息和标签列表的响应
     """
     try:
-        if os.path.exists(TAGS_CONFIG_PATH):
-            with open(TAGS_CONFIG_PATH, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                return Response(
-                    status="success",
-                    message="获取标签列表成功",
-                    data=config
-                )
-        else:
-            # 如果配置文件不存在，返回空列表
-            default_config = {"special_tags": []}
-            with open(TAGS_CONFIG_PATH, 'w', encoding='utf-8') as f:
-                json.dump(default_config, f, ensure_ascii=False, indent=2)
-            return Response(
-                status="success",
-                message="配置文件不存在，已创建默认配置",
-                data=default_config
-            )
-    except Exception as e:
+        st = os.stat(TAGS_CONFIG_PATH)
+    except FileNotFoundError:
+        # 如果配置文件不存在，返回空列表
+        default_config = {"special_tags": []}
+        _write_tags_config(default_config)
         return Response(
-            status="error",
-            message=f"获取标签列表时出错: {str(e)}"
+            status="success",
+            message="配置文件不存在，已创建默认配置",
+            data=default_config
         )
+    
+    etag = _tags_etag(st)
+    if request.headers.get("if-none-match") == etag:
+        return HTTPResponse(status_code=304, headers={"ETag": etag})
+    
+    # 直接返回缓存的响应体，跳过模型构造和序列化
+    return HTTPResponse(
+        content=_load_tags_body_cached(st),
+        media_type="application/json",
+        headers={"ETag": etag}
+    )
 
 @app.post("/tags")
-async def update_tags(config: TagsConfig):
+def update_tags(config: TagsConfig):
     """更新特别关注的标签列表
     
     Args:
@@ -111,71 +272,135 @@ async def update_tags(config: TagsConfig):
     Returns:
         包含状态、消息和更新后的标签列表的响应
     """
+    # 确保配置目录存在
+    os.makedirs(os.path.dirname(TAGS_CONFIG_PATH), exist_ok=True)
+    
+    # 去重并保持原有顺序
+    special_tags = list(dict.fromkeys(config.special_tags))
+    new_config = {"special_tags": special_tags}
+    
+    # 内容未变化时跳过写入，避免无意义的磁盘写和ETag变化
     try:
-        # 确保配置目录存在
-        os.makedirs(os.path.dirname(TAGS_CONFIG_PATH), exist_ok=True)
-        
+        current_config = _load_tags_cached(os.stat(TAGS_CONFIG_PATH))
+    except FileNotFoundError:
+        current_config = None
+    except ValueError:
+        # 配置文件已损坏时直接覆盖写入，POST /tags 仍可用于修复配置
+        current_config = None
+    
+    if new_config != current_config:
         # 写入配置文件
-        with open(TAGS_CONFIG_PATH, 'w', encoding='utf-8') as f:
-            json.dump({"special_tags": config.special_tags}, f, ensure_ascii=False, indent=2)
+        _write_tags_config(new_config)
+    
+    return Response(
+        status="success",
+        message="标签列表更新成功",
+        data={"special_tags": special_tags}
+    )
+
+def _parse_store_items(body: bytes) -> List[Dict[str, Any]]:
+    """解析并校验 /data 请求体
+    
+    Args:
+        body: 原始请求体
         
-        return Response(
-            status="success",
-            message="标签列表更新成功",
-            data={"special_tags": config.special_tags}
-        )
-    except Exception as e:
-        return Response(
-            status="error",
-            message=f"更新标签列表时出错: {str(e)}"
-        )
+    Returns:
+        可直接传给 store_many 的存储项列表
+        
+    Raises:
+        ValueError: 请求体不是合法的存储项列表
+    """
+    try:
+        payload = orjson.loads(body)
+    except orjson.JSONDecodeError as e:
+        raise ValueError(f"请求体不是合法的JSON: {str(e)}")
+    
+    if not isinstance(payload, list):
+        raise ValueError("请求体必须是存储项列表")
+    if not payload:
+        raise ValueError("存储项列表不能为空")
+    
+    items = []
+    for index, item in enumerate(payload):
+        if not isinstance(item, dict) or not isinstance(item.get("content"), dict):
+            raise ValueError(f"第 {index} 项缺少content字典")
+        
+        tags = item.get("tags")
+        if tags is None:
+            tags = []
+        elif not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+            raise ValueError(f"第 {index} 项的tags必须是字符串数组")
+        
+        uid = item.get("uid")
+        if uid is not None and not isinstance(uid, str):
+            raise ValueError(f"第 {index} 项的uid必须是字符串")
+        
+        items.append({"content": item["content"], "tags": tags, "uid": uid})
+    
+    return items
 
-@app.post("/data")
-async def store_data(request: StoreRequest):
+@app.post(
+    "/data",
+    openapi_extra={"requestBody": {"required": True, "content": {"application/json": {"schema": STORE_REQUEST_SCHEMA}}}}
+)
+async def store_data(request: Request, connector: AsyncMongoDBConnector = Depends(get_async_connector)):
     """存储数据
     
+    请求体为存储项列表，每个存储项包含内容字典、可选的标签数组和可选UID。
+    请求体直接用 orjson 解析，只校验每项的 content/tags/uid 类型，不对 content 内部做校验。
+    
     Args:
-        request: 包含一个或多个存储项的列表，每个存储项包含内容字典、标签数组和可选UID
+        request: 原始请求
+        connector: 异步数据库连接器（通过依赖注入获取，可在测试中覆盖）
         
     Returns:
         包含状态、消息和数据的响应
     """
     try:
-        db = get_db_manager()
-        results = []
-        failed_count = 0
-        
-        # 遍历请求中的每个存储项，单独存储
-        for item in request.root:
-            result = db.connector.store_data(
-                content=item.content,
-                tags=item.tags,
-                uid=item.uid
-            )
-            
-            if result:
-                # 添加到UID跟踪器
-                uid_tracker.add_uid(result["uuid"], API_TASK_ID)
-                results.append(result)
-            else:
-                failed_count += 1
+        items = _parse_store_items(await request.body())
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    # 使用异步连接器在事件循环中等待写入完成，不占用线程池
+    results, failed = await connector.store_many(items)
+    if not results:
+        # 全部因UID重复而失败是客户端错误，其余情况才是服务端故障
+        if all(code == DUPLICATE_KEY_ERROR for code in failed.values()):
+            raise HTTPException(status_code=409, detail="所有数据的UID均已存在")
+        raise HTTPException(status_code=500, detail="所有数据存储失败")
+    failed_count = len(failed)
+    
+    # UID跟踪器使用同步客户端，放到线程中批量添加
+    await asyncio.to_thread(_track_uids, [result["uuid"] for result in results])
+    
+    return Response(
+        status="success",
+        message=f"成功存储 {len(results)} 条数据" + (f", {failed_count} 条失败" if failed_count > 0 else ""),
+        data={"stored_items": results}
+    )
+
+@app.get("/content/{uid}")
+async def get_content(uid: str, connector: AsyncMongoDBConnector = Depends(get_async_connector)):
+    """根据UID获取内容
+    
+    使用异步连接器直接在事件循环中等待MongoDB返回，不占用线程池
+    
+    Args:
+        uid: 内容UID
+        connector: 异步数据库连接器（通过依赖注入获取）
         
-        if results:
-            return Response(
-                status="success",
-                message=f"成功存储 {len(results)} 条数据" + (f", {failed_count} 条失败" if failed_count > 0 else ""),
-                data={"stored_items": results}
-            )
-        else:
-            return Response(
-                status="error",
-                message="所有数据存储失败"
-            )
-    except Exception as e:
-        return Response(
-            status="error",
-            message=f"数据存储时出错: {str(e)}"
-        )
+    Returns:
+        包含状态、消息和内容数据的响应
+    """
+    result = await connector.get_data_by_uids(uid)
+    if not result:
+        raise HTTPException(status_code=404, detail=f"未找到UID为 {uid} 的内容")
+    
+    return Response(
+        status="success",
+        message="获取内容成功",
+        data=result
+    )
 
 
 # 导出函数，用于其他模块直接导入
@@ -201,4 +426,10 @@ def get_data_by_uids(uid: Union[str, List[str]]) -> Union[Dict[str, Any], List[D
         return {} if not isinstance(uid, list) else []
 
 if __name__ == "__main__":
-    uvicorn.run("warehouse.api:app", host="0.0.0.0", port=8000, reload=True)
+    # 与 run.py 使用同一个 WAREHOUSE_WORKERS 设置；单 worker 时保持开发用的热重载
+    # 各 worker 的状态都在 MongoDB 和标签配置文件中，可以安全地多进程运行
+    workers = int(os.getenv("WAREHOUSE_WORKERS", "1"))
+    if workers > 1:
+        uvicorn.run("warehouse.api:app", host="0.0.0.0", port=8000, workers=workers)
+    else:
+        uvicorn.run("warehouse.api:app", host="0.0.0.0", port=8000, reload=True)
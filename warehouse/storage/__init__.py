@@ -2,6 +2,7 @@
 # -*- coding: utf-8 -*-
 
 import os
+import functools
 from dotenv import load_dotenv
 
 # 加载环境变量
@@ -10,10 +11,12 @@ load_dotenv()
 # 默认数据库类型
 DEFAULT_DB_TYPE = os.getenv("DB_TYPE", "mongodb")
 
+@functools.lru_cache(maxsize=1)
 def get_db_connector():
     """获取数据库连接器
     
     根据环境变量 DB_TYPE 选择合适的数据库连接器
+    数据库类型在部署期间不会变化，结果按进程缓存，只在首次调用时读取环境变量和导入模块
     
     Returns:
         数据库连接器实例
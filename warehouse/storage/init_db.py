@@ -2,9 +2,15 @@
 # -*- coding: utf-8 -*-
 
 import os
+import orjson
 import logging
+from datetime import datetime
+from itertools import islice
 from dotenv import load_dotenv, set_key
-from warehouse.storage.mongodb.connector import MongoDBConnector
+from pymongo import IndexModel
+from pymongo.errors import BulkWriteError
+from warehouse.storage.mongodb.connector import get_connector
+from warehouse.storage.mongodb.documents import build_document
 
 # Configure logging
 logging.basicConfig(
@@ -24,8 +30,9 @@ def init_db_env():
         with open(env_file, "w") as f:
             pass
     
-    # Set database type
-    set_key(env_file, "DB_TYPE", "mongodb")
+    # Set database type; set_key rewrites the whole file, so skip it when already set
+    if os.getenv("DB_TYPE") != "mongodb":
+        set_key(env_file, "DB_TYPE", "mongodb")
     logger.info("Database type set to: mongodb")
     
     # Read MongoDB environment variables from .env file in the root directory
@@ -43,17 +50,113 @@ def init_db_env():
     logger.info("MongoDB environment variables set")
 
 def initialize_db():
-    connector = MongoDBConnector()
-    # Create indexes
-    connector.collection.create_index('uuid', unique=True)
-    connector.collection.create_index('createdAt')
-    connector.collection.create_index('tag')
+    connector = get_connector()
+    # Documents are keyed by their UUID in _id; the old uuid field is obsolete,
+    # so drop its unique index if an older deployment created it. tag_1 was
+    # built on a field documents never had (they store 'tags')
+    existing = connector.collection.index_information()
+    for obsolete in ('uuid_1', 'tag_1'):
+        if obsolete in existing:
+            connector.collection.drop_index(obsolete)
+    
+    # Create indexes that do not exist yet
+    existing = {index['name'] for index in connector.collection.list_indexes()}
+    specs = [
+        ('createdAt_1', [('createdAt', 1)]),
+        ('tags_1', [('tags', 1)]),
+    ]
+    built = []
+    for name, keys in specs:
+        if name not in existing:
+            connector.collection.create_index(keys, name=name)
+            built.append(name)
+    logger.info(f"Indexes built: {built or 'none (all already exist)'}")
+
+# Indexes the running tasks query while a bulk load is in progress
+BULK_LOAD_KEEP_INDEXES = {'createdAt_1'}
+
+def bulk_load(connector, docs, chunk_size=10000):
+    """Load a large number of documents with secondary indexes dropped
+    
+    Non-unique secondary indexes are dropped before loading and rebuilt once
+    afterwards with their original options, so MongoDB does not maintain
+    them for every inserted document. Unique indexes and _id are kept so
+    duplicates are still rejected, and BULK_LOAD_KEEP_INDEXES are kept so
+    the task polls do not fall back to collection scans.
+    
+    Args:
+        connector: MongoDB connector
+        docs: Iterable of dictionaries with 'content' and optional 'tags' and 'uid' keys
+        chunk_size: Number of documents per insert_many call
+    
+    Returns:
+        Number of documents inserted
+    """
+    collection = connector.collection
+    
+    # Remember and drop non-essential indexes, keeping options such as
+    # sparse, partialFilterExpression and expireAfterSeconds for the rebuild
+    dropped = []
+    for name, info in collection.index_information().items():
+        if name == '_id_' or info.get('unique') or name in BULK_LOAD_KEEP_INDEXES:
+            continue
+        options = {key: value for key, value in info.items() if key not in ('key', 'v', 'ns')}
+        dropped.append(IndexModel(info['key'], name=name, **options))
+        collection.drop_index(name)
+    dropped_names = [model.document['name'] for model in dropped]
+    logger.info(f"Dropped indexes before bulk load: {dropped_names}")
+    
+    inserted = 0
+    try:
+        docs = iter(docs)
+        while True:
+            now = datetime.now()
+            batch = [
+                build_document(doc['content'], doc.get('tags') or [], doc.get('uid'), now)
+                for doc in islice(docs, chunk_size)
+            ]
+            if not batch:
+                break
+            
+            try:
+                collection.insert_many(batch, ordered=False)
+                inserted += len(batch)
+            except BulkWriteError as e:
+                failed = len(e.details.get('writeErrors', []))
+                inserted += len(batch) - failed
+                logger.error(f"Failed to insert {failed} of {len(batch)} documents: {str(e)}")
+    finally:
+        # Rebuild the dropped indexes in one pass over the loaded data
+        if dropped:
+            collection.create_indexes(dropped)
+        logger.info(f"Recreated indexes after bulk load: {dropped_names}")
+    
+    logger.info(f"Bulk loaded {inserted} documents")
+    return inserted
+
+def _read_json_lines(path):
+    """Yield one document per non-empty line of a JSON Lines file"""
+    with open(path, 'rb') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield orjson.loads(line)
 
 if __name__ == "__main__":
-    import sys
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Initialize the DegenPy MongoDB database")
+    parser.add_argument("--bulk-load", metavar="FILE",
+                        help="seed the collection from a JSON Lines file of {content, tags, uid} documents")
+    parser.add_argument("--chunk-size", type=int, default=10000,
+                        help="documents per insert_many when bulk loading (default: 10000)")
+    args = parser.parse_args()
     
     # Initialize database environment
     init_db_env()
     
     # Initialize database
     initialize_db()
+    
+    if args.bulk_load:
+        bulk_load(get_connector(), _read_json_lines(args.bulk_load), chunk_size=args.chunk_size)
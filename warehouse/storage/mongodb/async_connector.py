@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import logging
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import BulkWriteError
+
+from warehouse.storage.mongodb.connector import client_options, get_config
+from warehouse.storage.mongodb.documents import (
+    DATA_PROJECTION, build_documents, failed_writes, insert_operations,
+    read_cache_from_env, stored_results, to_data
+)
+
+logger = logging.getLogger("mongodb_async_connector")
+
+class AsyncMongoDBConnector:
+    """Async MongoDB Connector
+
+    Motor-based counterpart of MongoDBConnector for use inside the FastAPI
+    event loop. Queries are awaited natively instead of blocking a
+    threadpool worker for the duration of the MongoDB roundtrip.
+    """
+
+    def __init__(self, db_name=None, collection_name=None):
+        """Initialize Async MongoDB Connector"""
+        cfg = get_config()
+        connection_string = cfg.connection_string
+        if not connection_string:
+            raise ValueError("Environment variable MONGODB_CONNECTION_STRING not set, please configure in .env file")
+        # Same pool, compression and retry settings as the sync client
+        self.client = AsyncIOMotorClient(connection_string, **client_options())
+
+        db_name = db_name or cfg.db_name
+        if not db_name:
+            raise ValueError("Environment variable MONGODB_DATABASE not set, please configure in .env file")
+
+        collection_name = collection_name or cfg.collection_name
+        if not collection_name:
+            raise ValueError("Environment variable MONGODB_COLLECTION not set, please configure in .env file")
+
+        self.db = self.client[db_name]
+        self.collection = self.db[collection_name]
+
+        # Results of recent UID lookups
+        self._read_cache = read_cache_from_env()
+
+        logger.info(f"Async MongoDB Connector initialized: {db_name}, Collection: {collection_name}")
+
+    async def store_many(self, items):
+        """Store multiple already-validated items with a single unordered bulk write
+
+        Args:
+            items: List of dictionaries with 'content' (dict), 'tags' (list)
+                and optional 'uid' keys
+
+        Returns:
+            (list of stored documents, {index of each failed item: server error code})
+        """
+        if not items:
+            return [], {}
+
+        documents = build_documents(items)
+
+        failed = {}
+        try:
+            await self.collection.bulk_write(insert_operations(documents), ordered=False)
+        except BulkWriteError as e:
+            failed = failed_writes(e)
+            logger.error(f"Error storing {len(failed)} of {len(documents)} documents: {str(e)}")
+
+        return stored_results(documents, failed), failed
+
+    async def get_data_by_uids(self, uuids):
+        """Get data by one or more UUIDs
+
+        Args:
+            uuids: Single UUID or list of UUIDs
+
+        Returns:
+            List of data when uuids is a list, single data object or None when uuids is a single UUID
+
+        Driver errors are not caught; the API turns them into a 500 instead
+        of reporting a missing document.
+        """
+        # Serve what we can from the read cache and query only the rest
+        found, missing = self._read_cache.split(uuids)
+
+        # Single UUID, or a one-element list: a direct _id equality lookup
+        if len(missing) == 1:
+            doc = await self.collection.find_one({'_id': missing[0]}, DATA_PROJECTION)
+            fetched = [to_data(doc)] if doc else []
+        elif missing:
+            cursor = self.collection.find(
+                {'_id': {'$in': missing}},
+                DATA_PROJECTION
+            ).batch_size(len(missing))
+            # The whole result is materialized, so fetch it in one batch
+            # (the server still splits batches at 16MB)
+            fetched = [to_data(doc) for doc in await cursor.to_list(length=None)]
+        else:
+            fetched = []
+
+        return self._read_cache.merge(uuids, found, fetched)
+
+    def close(self):
+        """Close the underlying Motor client"""
+        self.client.close()
@@ -2,14 +2,20 @@
 # -*- coding: utf-8 -*-
 
 import os
-import json
-import time
-import uuid
+import orjson
 import logging
+import functools
+import threading
+from dataclasses import dataclass
 from typing import Dict, List, Optional, Any
 from dotenv import load_dotenv
 from pymongo import MongoClient
-from datetime import datetime
+from pymongo.errors import BulkWriteError
+
+from warehouse.storage.mongodb.documents import (
+    DATA_PROJECTION, build_document, build_documents, failed_writes,
+    insert_operations, read_cache_from_env, stored_results, stored_to_result, to_data
+)
 
 # Removed Redis and message queue dependencies to improve connector reusability
 
@@ -20,27 +26,129 @@ logging.basicConfig(
 )
 logger = logging.getLogger("mongodb_connector")
 
-# Load environment variables
-# Force reload of .env file to ensure the latest configuration is used
-load_dotenv(override=True)
+@dataclass(frozen=True)
+class MongoDBConfig:
+    """MongoDB settings resolved from the environment"""
+    connection_string: Optional[str]
+    db_name: Optional[str]
+    collection_name: Optional[str]
+
+@functools.lru_cache(maxsize=1)
+def get_config() -> MongoDBConfig:
+    """Load .env and resolve the MongoDB settings once per process"""
+    # Load .env once per process; override=True lets .env values win over inherited variables
+    load_dotenv(override=True)
+    return MongoDBConfig(
+        connection_string=os.getenv('MONGODB_CONNECTION_STRING'),
+        db_name=os.getenv('MONGODB_DATABASE'),
+        collection_name=os.getenv('MONGODB_COLLECTION')
+    )
+
+def _content_from_str(content: str) -> dict:
+    """Parse a JSON object string, or wrap plain text as {"text": ...}"""
+    # Only a JSON object can become the content dictionary; checking the first
+    # character avoids raising and catching a decode error for plain text
+    if content.lstrip()[:1] != '{':
+        return {"text": content}
+    
+    try:
+        parsed = orjson.loads(content)
+    except orjson.JSONDecodeError:
+        return {"text": content}
+    return parsed if isinstance(parsed, dict) else {"text": content}
+
+def _content_from_bytes(content: bytes) -> dict:
+    """Decode UTF-8 bytes and handle them like a string"""
+    return _content_from_str(content.decode('utf-8', errors='replace'))
+
+def _content_from_other(content) -> dict:
+    """Fallback for content types without a dedicated normalizer"""
+    if isinstance(content, dict):
+        return content
+    logger.warning(f"Content is not a dictionary: {type(content)}, creating default content")
+    return {"text": str(content)}
+
+# Content normalizers keyed by exact type, so the common cases need one dict lookup
+_CONTENT_NORMALIZERS = {
+    dict: lambda content: content,
+    str: _content_from_str,
+    bytes: _content_from_bytes,
+}
+
+def _normalize(content, tags):
+    """Coerce content to a dictionary and tags to a list
+    
+    Returns:
+        (content, tags)
+    """
+    # Ensure content is a dictionary
+    content = _CONTENT_NORMALIZERS.get(type(content), _content_from_other)(content)
+    
+    # Ensure tags is an array
+    if tags is None:
+        tags = []
+    elif not isinstance(tags, list):
+        logger.warning(f"Tags is not an array: {type(tags)}, using empty array instead")
+        tags = []
+    
+    return content, tags
+
+# MongoClient instances shared by every connector in the process, keyed by connection string
+_clients = {}
+_clients_lock = threading.Lock()
+
+def client_options() -> dict:
+    """Keyword options shared by the sync MongoClient and the Motor client
+    
+    Pool sizing is read from MONGODB_POOL_MAX and MONGODB_POOL_MIN.
+    MONGODB_COMPRESSORS (e.g. "zstd,zlib") enables wire compression; zstd
+    and snappy need their optional Python packages.
+    """
+    options = {
+        'maxPoolSize': int(os.getenv('MONGODB_POOL_MAX', '100')),
+        'minPoolSize': int(os.getenv('MONGODB_POOL_MIN', '10')),
+        'maxIdleTimeMS': 60000,
+        'retryWrites': True,
+        'appname': 'degenpy'
+    }
+    compressors = os.getenv('MONGODB_COMPRESSORS')
+    if compressors:
+        options['compressors'] = compressors
+    return options
+
+def get_client(connection_string: str) -> MongoClient:
+    """Get the process-wide pooled MongoClient for a connection string
+    
+    MongoClient is thread-safe and maintains its own connection pool, so
+    creating one per connector only repeats the server handshake and
+    duplicates pools. The client is configured by client_options().
+    """
+    with _clients_lock:
+        client = _clients.get(connection_string)
+        if client is None:
+            client = MongoClient(connection_string, **client_options())
+            _clients[connection_string] = client
+        return client
 
 class MongoDBConnector:
     """MongoDB Connector"""
     
     def __init__(self, db_name=None, collection_name=None):
         """Initialize MongoDB Connector"""
+        cfg = get_config()
+        
         # Use connection string from environment variables, no default value provided
-        connection_string = os.getenv('MONGODB_CONNECTION_STRING')
+        connection_string = cfg.connection_string
         if not connection_string:
             raise ValueError("Environment variable MONGODB_CONNECTION_STRING not set, please configure in .env file")
-        self.client = MongoClient(connection_string)
+        self.client = get_client(connection_string)
         
         # Use database and collection names from environment variables, no default values provided
-        db_name = db_name or os.getenv('MONGODB_DATABASE')
+        db_name = db_name or cfg.db_name
         if not db_name:
             raise ValueError("Environment variable MONGODB_DATABASE not set, please configure in .env file")
             
-        collection_name = collection_name or os.getenv('MONGODB_COLLECTION')
+        collection_name = collection_name or cfg.collection_name
         if not collection_name:
             raise ValueError("Environment variable MONGODB_COLLECTION not set, please configure in .env file")
         
@@ -51,6 +159,9 @@ class MongoDBConnector:
         
         # Removed Redis and message queue initialization to improve connector reusability
         
+        # Results of recent UID lookups
+        self._read_cache = read_cache_from_env()
+        
         logger.info(f"MongoDB Connector initialized: {db_name}, Collection: {collection_name}")
         
     def store_data(self, content, tags=None, uid=None):
@@ -65,50 +176,61 @@ class MongoDBConnector:
             The stored document on success
         """
         try:
-            # Auto-generate UUID if not provided
-            if not uid:
-                uid = str(uuid.uuid4())
-            
-            # Ensure content is a dictionary
-            if not isinstance(content, dict):
-                try:
-                    # Try to parse string as JSON
-                    if isinstance(content, str):
-                        content = json.loads(content)
-                    else:
-                        # If not a dictionary or string, create a default content dictionary
-                        logger.warning(f"Content is not a dictionary: {type(content)}, creating default content")
-                        content = {"text": str(content)}
-                except json.JSONDecodeError:
-                    # If JSON parsing fails, create default content
-                    content = {"text": content if isinstance(content, str) else str(content)}
-            
-            # Ensure tags is an array
-            if tags is None:
-                tags = []
-            elif not isinstance(tags, list):
-                logger.warning(f"Tags is not an array: {type(tags)}, using empty array instead")
-                tags = []
-            
-            # Create document
-            document = {
-                '_id': uid,  # Use UUID as MongoDB's _id field
-                'content': content,  # Store the complete content dictionary
-                'tags': tags,
-                'createdAt': datetime.now()  # Store creation timestamp
-            }
-            result = self.collection.insert_one(document)
-            
-            # Return the complete document
-            return {
-                'uuid': uid,
-                'content': content,
-                'tags': tags
-            }
+            content, tags = _normalize(content, tags)
+            return self.store_document(content, tags, uid)
         except Exception as e:
             logger.error(f"Error storing data: {str(e)}")
             return None
+    
+    def store_document(self, content, tags, uid=None):
+        """Store already-validated data in MongoDB
+        
+        Skips the type normalization done by store_data; callers must pass a
+        content dictionary and a tags list (e.g. fields of a validated
+        Pydantic model).
+        
+        Args:
+            content: Content dictionary
+            tags: Tags array
+            uid: Content UUID (optional, will be auto-generated if not provided)
+            
+        Returns:
+            The stored document on success
+        """
+        document = build_document(content, tags, uid)
+        self.collection.insert_one(document)
+        
+        # Return the complete document
+        return stored_to_result(document)
+            
+    def store_many(self, items):
+        """Store multiple already-validated items with a single unordered bulk write
+        
+        Uses an unordered write so one failing document (e.g. a duplicate
+        UUID) does not prevent the rest of the batch from being written.
+        
+        Args:
+            items: List of dictionaries with 'content' (dict), 'tags' (list)
+                and optional 'uid' keys
             
+        Returns:
+            (list of stored documents, {index of each failed item: server error code})
+        """
+        if not items:
+            return [], {}
+        
+        documents = build_documents(items)
+        
+        # bulk_write keeps this a single round trip even if updates are mixed in later
+        failed = {}
+        try:
+            self.collection.bulk_write(insert_operations(documents), ordered=False)
+        except BulkWriteError as e:
+            failed = failed_writes(e)
+            logger.error(f"Error storing {len(failed)} of {len(documents)} documents: {str(e)}")
+        
+        return stored_results(documents, failed), failed
+    
     def get_data_by_uids(self, uuids):
         """Get data by one or more UUIDs
         
@@ -119,35 +241,36 @@ class MongoDBConnector:
             List of data when uuids is a list, single data object or None when uuids is a single UUID
         """
         try:
-            # Handle single UUID case
-            single_uuid = False
-            if not isinstance(uuids, list):
-                uuids = [uuids]
-                single_uuid = True
-            
-            # Query using _id field, as we now use UUID as _id
-            documents = list(self.collection.find({'_id': {'$in': uuids}}))
+            # Serve what we can from the read cache and query only the rest
+            found, missing = self._read_cache.split(uuids)
             
-            # Format results
-            results = [{
-                'uuid': doc['_id'],
-                'content': doc['content'],
-                'tags': doc.get('tags', [])
-            } for doc in documents]
+            # Single UUID, or a one-element list: a direct _id equality lookup
+            # skips the $in query planning and the cursor setup
+            if len(missing) == 1:
+                doc = self.collection.find_one({'_id': missing[0]}, DATA_PROJECTION)
+                fetched = [to_data(doc)] if doc else []
+            elif missing:
+                # Query using _id field, as we now use UUID as _id. The whole
+                # result is materialized anyway, so ask for it in one batch (the
+                # server still splits batches at 16MB)
+                cursor = self.collection.find(
+                    {'_id': {'$in': missing}},
+                    DATA_PROJECTION
+                ).batch_size(len(missing))
+                fetched = [to_data(doc) for doc in cursor]
+            else:
+                fetched = []
             
-            # If single UUID, return single result or None
-            if single_uuid:
-                return results[0] if results else None
-            
-            # Otherwise return the list
-            return results
+            return self._read_cache.merge(uuids, found, fetched)
         except Exception as e:
             logger.error(f"Error retrieving data by UID: {str(e)}")
-            return [] if not single_uuid else None
-
-# Create MongoDB connector instance
-mongodb_connector = MongoDBConnector()
+            return [] if isinstance(uuids, list) else None
 
+@functools.lru_cache(maxsize=1)
 def get_connector():
-    """Get MongoDB connector instance"""
-    return mongodb_connector
+    """Get MongoDB connector instance
+    
+    The connector is created on first use rather than at import time, so
+    importing this module does not open a MongoDB connection.
+    """
+    return MongoDBConnector()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Document building shared by the sync and async MongoDB connectors
+
+Nothing in this module performs I/O. MongoDBConnector and
+AsyncMongoDBConnector only differ in how they talk to the server, so both
+build documents, results and cached lookups through these helpers.
+"""
+
+import copy
+import os
+import time
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from pymongo import InsertOne
+from pymongo.errors import BulkWriteError
+
+# Fields returned by UID lookups; other fields stay on the server
+DATA_PROJECTION = {'_id': 1, 'content': 1, 'tags': 1}
+
+# Server error code for a write rejected because the _id already exists
+DUPLICATE_KEY_ERROR = 11000
+
+def _format_uuid4(raw: bytes) -> str:
+    """Format 16 random bytes as an RFC 4122 version 4 UUID string"""
+    b = bytearray(raw)
+    b[6] = (b[6] & 0x0f) | 0x40
+    b[8] = (b[8] & 0x3f) | 0x80
+    h = b.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+def _uuid4_str() -> str:
+    """Generate a random RFC 4122 version 4 UUID string
+
+    Equivalent to str(uuid.uuid4()) but sets the version/variant bits on the
+    raw bytes directly instead of going through a uuid.UUID object.
+    """
+    return _format_uuid4(os.urandom(16))
+
+def _uuid4_strs(count: int) -> List[str]:
+    """Generate several version 4 UUID strings from a single os.urandom call"""
+    raw = os.urandom(16 * count)
+    return [_format_uuid4(raw[i:i + 16]) for i in range(0, 16 * count, 16)]
+
+def build_document(content: dict, tags: list, uid: Optional[str] = None,
+                   created_at: Optional[datetime] = None) -> dict:
+    """Build the MongoDB document for a content item
+
+    Args:
+        content: Content dictionary
+        tags: Tags array
+        uid: Content UUID (optional, will be auto-generated if not provided)
+        created_at: Creation timestamp (optional, defaults to now; pass one
+            value for a whole batch)
+    """
+    return {
+        '_id': uid or _uuid4_str(),  # Use UUID as MongoDB's _id field
+        'content': content,  # Store the complete content dictionary
+        'tags': tags,
+        'createdAt': created_at or datetime.now()  # Store creation timestamp
+    }
+
+def build_documents(items) -> List[dict]:
+    """Build the documents for a batch of already-validated items
+
+    Args:
+        items: List of dictionaries with 'content' (dict), 'tags' (list)
+            and optional 'uid' keys
+    """
+    # Draw the random bytes for all missing UUIDs at once
+    missing = sum(1 for item in items if not item.get('uid'))
+    new_uids = iter(_uuid4_strs(missing))
+
+    now = datetime.now()
+    return [
+        build_document(item['content'], item['tags'], item.get('uid') or next(new_uids), now)
+        for item in items
+    ]
+
+def insert_operations(documents: List[dict]) -> List[InsertOne]:
+    """Wrap documents as InsertOne operations for an unordered bulk_write"""
+    return [InsertOne(document) for document in documents]
+
+def failed_writes(error: BulkWriteError) -> Dict[int, int]:
+    """Map the index of each failed document to its server error code"""
+    return {item['index']: item.get('code') for item in error.details.get('writeErrors', [])}
+
+def stored_to_result(document: dict) -> dict:
+    """Turn a just-inserted document into the returned result in place
+
+    Renames _id to uuid and drops createdAt, reusing the document dict
+    instead of building a second one.
+    """
+    document['uuid'] = document.pop('_id')
+    del document['createdAt']
+    return document
+
+def stored_results(documents: List[dict], failed) -> List[dict]:
+    """Results for every document of a bulk write except the failed indexes"""
+    return [
+        stored_to_result(document)
+        for index, document in enumerate(documents) if index not in failed
+    ]
+
+def to_data(doc: dict) -> dict:
+    """Convert a fetched document to the external data format in place
+
+    The document comes straight from a DATA_PROJECTION query and is owned
+    by the caller, so _id is renamed instead of copying into a new dict.
+    """
+    doc['uuid'] = doc.pop('_id')
+    doc.setdefault('tags', [])
+    return doc
+
+class ReadCache:
+    """Bounded, thread-safe TTL cache of UID lookup results
+
+    Stored documents are never modified, so a cached result can only go
+    stale by expiring. Misses are not cached because the document may be
+    written later. Entries are deep-copied on the way in and out, so callers
+    can modify the returned data, including the nested content and tags,
+    without touching the cache.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, uids) -> Dict[str, dict]:
+        """Return the cached results for uids, keyed by UID"""
+        if self.maxsize <= 0:
+            return {}
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for uid in uids:
+                entry = self._entries.get(uid)
+                if entry is None:
+                    continue
+                expires, data = entry
+                if expires < now:
+                    del self._entries[uid]
+                    continue
+                self._entries.move_to_end(uid)
+                found[uid] = copy.deepcopy(data)
+        return found
+
+    def put_many(self, results):
+        """Cache lookup results (data dictionaries with a 'uuid' key)"""
+        if self.maxsize <= 0:
+            return
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for data in results:
+                self._entries[data['uuid']] = (expires, copy.deepcopy(data))
+                self._entries.move_to_end(data['uuid'])
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def split(self, uuids) -> Tuple[Dict[str, dict], List[str]]:
+        """Split a get_data_by_uids argument into cached results and UIDs to query
+
+        Args:
+            uuids: Single UUID or list of UUIDs
+
+        Returns:
+            (cached results keyed by UID, UIDs that still need a query)
+        """
+        uid_list = uuids if isinstance(uuids, list) else [uuids]
+        found = self.get_many(uid_list)
+        return found, [uid for uid in uid_list if uid not in found]
+
+    def merge(self, uuids, found: Dict[str, dict], fetched: List[dict]):
+        """Cache freshly fetched results and shape the get_data_by_uids return value
+
+        Returns:
+            List of data when uuids is a list, single data object or None when uuids is a single UUID
+        """
+        self.put_many(fetched)
+        results = list(found.values()) + fetched
+        if isinstance(uuids, list):
+            return results
+        return results[0] if results else None
+
+def read_cache_from_env() -> ReadCache:
+    """Create a UID lookup cache sized from MONGODB_READ_CACHE_SIZE/TTL (0 disables)"""
+    return ReadCache(
+        int(os.getenv('MONGODB_READ_CACHE_SIZE', '10000')),
+        float(os.getenv('MONGODB_READ_CACHE_TTL', '30'))
+    )
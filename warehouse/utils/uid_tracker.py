@@ -1,13 +1,22 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import functools
 import logging
+import random
+import threading
+from collections import OrderedDict, defaultdict
 from datetime import datetime
 from typing import List, Optional
+from pymongo import UpdateOne
+from pymongo.errors import OperationFailure
 
 # 设置日志
 logger = logging.getLogger(__name__)
 
+# 同名索引已存在但选项不同时MongoDB返回的错误码
+INDEX_OPTIONS_CONFLICT = 85
+
 class DBUIDTracker:
     """基于数据库的UID跟踪器，用于记录已处理的UID
     
@@ -15,19 +24,46 @@ class DBUIDTracker:
     并支持多个任务分别跟踪各自的处理状态。
     """
     
-    def __init__(self, collection_name="processed_uids", max_size=1000):
+    def __init__(self, collection_name="processed_uids", max_size=1000,
+                 ttl_seconds=7 * 24 * 3600, trim_sample_rate=0.001):
         """初始化跟踪器
         
         Args:
             collection_name: MongoDB中用于存储处理状态的集合名称
-            max_size: 每个任务最多保存的记录数量
+            max_size: 每个任务最多保存的记录数量（按采样修剪，是软上限）
+            ttl_seconds: 记录的过期时间，由MongoDB的TTL索引在服务端删除
+            trim_sample_rate: 每写入一条记录触发一次数量修剪的概率
         """
-        from warehouse.storage.mongodb.connector import mongodb_connector
-        self.db = mongodb_connector
+        from warehouse.storage.mongodb.connector import get_connector
+        self.db = get_connector()
         self.collection_name = collection_name
         self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.trim_sample_rate = trim_sample_rate
+        # 每个任务最近确认已处理的UID（LRU，最多max_size条），命中时无需查询数据库
+        self._seen = defaultdict(OrderedDict)
+        self._seen_lock = threading.Lock()
         self._ensure_collection()
     
+    def _remember(self, uids: List[str], task_id: str):
+        """把UID记入task_id的已处理缓存
+        
+        每个UID在集合中只有一条记录，写入后它只属于task_id，
+        因此同时从其他任务的缓存中移除
+        """
+        with self._seen_lock:
+            for other_id, other in self._seen.items():
+                if other_id != task_id:
+                    for uid in uids:
+                        other.pop(uid, None)
+            
+            seen = self._seen[task_id]
+            for uid in uids:
+                seen[uid] = None
+                seen.move_to_end(uid)
+            while len(seen) > self.max_size:
+                seen.popitem(last=False)
+    
     def _ensure_collection(self):
         """确保集合存在"""
         if self.collection_name not in self.db.db.list_collection_names():
@@ -36,10 +72,40 @@ class DBUIDTracker:
             # 不将_id和task_id设置为联合唯一索引，因为_id已经是唯一的
             self.db.db[self.collection_name].create_index([("task_id", 1)])
             self.db.db[self.collection_name].create_index([("task_id", 1), ("processed_at", 1)])
+        
+        # 旧记录由TTL索引在服务端定期删除，写入路径不再每次修剪；
+        # (task_id, _id)索引让get_unprocessed的查询完全由索引覆盖
+        # 两个索引分开创建，TTL索引出错不会影响覆盖索引
+        try:
+            self.db.db[self.collection_name].create_index(
+                [("processed_at", 1)],
+                expireAfterSeconds=self.ttl_seconds
+            )
+        except OperationFailure as e:
+            if e.code != INDEX_OPTIONS_CONFLICT:
+                logger.error(f"创建TTL索引时出错: {str(e)}")
+            else:
+                # 索引已存在但过期时间不同（ttl_seconds被修改过），用collMod原地修改
+                try:
+                    self.db.db.command(
+                        'collMod', self.collection_name,
+                        index={'keyPattern': {'processed_at': 1}, 'expireAfterSeconds': self.ttl_seconds}
+                    )
+                except Exception as e:
+                    logger.error(f"修改TTL索引过期时间时出错: {str(e)}")
+        except Exception as e:
+            logger.error(f"创建TTL索引时出错: {str(e)}")
+        
+        try:
+            self.db.db[self.collection_name].create_index([("task_id", 1), ("_id", 1)])
+        except Exception as e:
+            logger.error(f"创建索引时出错: {str(e)}")
     
     def add_uid(self, uid: str, task_id: str):
         """添加一个已处理的UID
         
+        需要记录多个UID时请使用add_uids，一次数据库往返即可完成
+        
         Args:
             uid: 要标记为已处理的UID
             task_id: 处理该UID的任务ID
@@ -54,28 +120,66 @@ class DBUIDTracker:
             return
             
         try:
-            # 先检查记录是否存在
-            existing = self.db.db[self.collection_name].find_one({"_id": uid})
+            # upsert本身就是原子的“存在则更新，否则插入”，无需先find_one
+            self.db.db[self.collection_name].update_one(
+                {"_id": uid},
+                {"$set": {"processed_at": datetime.now(), "task_id": task_id}},
+                upsert=True
+            )
+            self._remember([uid], task_id)
+            
+            # 按采样保持集合大小在限制内
+            self._maybe_trim(task_id, 1)
+        
+        except Exception as e:
+            logger.error(f"添加UID到数据库时出错: {str(e)}")
+    
+    def add_uids(self, uids: List[str], task_id: str):
+        """批量添加已处理的UID
+        
+        所有UID通过一次bulk_write写入，并且只修剪一次集合，
+        避免逐个调用add_uid产生的多次数据库往返
+        
+        Args:
+            uids: 要标记为已处理的UID列表
+            task_id: 处理这些UID的任务ID
+        """
+        if not task_id:
+            logger.warning(f"任务ID为空，无法添加UID: {uids}")
+            return
             
-            if existing:
-                # 如果记录已存在，只更新processed_at和task_id
-                self.db.db[self.collection_name].update_one(
+        uids = [uid for uid in uids if uid is not None]
+        if not uids:
+            return
+            
+        try:
+            now = datetime.now()
+            operations = [
+                UpdateOne(
                     {"_id": uid},
-                    {"$set": {"processed_at": datetime.now(), "task_id": task_id}}
+                    {"$set": {"processed_at": now, "task_id": task_id}},
+                    upsert=True
                 )
-            else:
-                # 如果记录不存在，则创建新记录
-                self.db.db[self.collection_name].insert_one({
-                    "_id": uid,
-                    "task_id": task_id,
-                    "processed_at": datetime.now()
-                })
-            
-            # 保持集合大小在限制内
-            self._trim_collection(task_id)
+                for uid in uids
+            ]
+            self.db.db[self.collection_name].bulk_write(operations, ordered=False)
+            self._remember(uids, task_id)
+            
+            # 按采样保持集合大小在限制内
+            self._maybe_trim(task_id, len(operations))
         
         except Exception as e:
-            logger.error(f"添加UID到数据库时出错: {str(e)}")
+            logger.error(f"批量添加UID到数据库时出错: {str(e)}")
+    
+    def _maybe_trim(self, task_id: str, written: int):
+        """按写入条数采样触发_trim_collection，作为TTL索引之外的兜底
+        
+        Args:
+            task_id: 任务ID
+            written: 本次写入的记录数
+        """
+        if random.random() < written * self.trim_sample_rate:
+            self._trim_collection(task_id)
     
     def _trim_collection(self, task_id: str):
         """修剪集合大小，删除最旧的记录
@@ -84,22 +188,19 @@ class DBUIDTracker:
             task_id: 任务ID
         """
         try:
-            # 计算当前记录数
-            count = self.db.db[self.collection_name].count_documents({"task_id": task_id})
-            
-            if count > self.max_size:
-                # 找出最旧的记录
-                oldest = list(self.db.db[self.collection_name].find(
-                    {"task_id": task_id}, 
-                    sort=[("processed_at", 1)]
-                ).limit(count - self.max_size))
-                
-                if oldest:
-                    # 批量删除
-                    oldest_ids = [doc["_id"] for doc in oldest if "_id" in doc]
-                    if oldest_ids:
-                        self.db.db[self.collection_name].delete_many({"_id": {"$in": oldest_ids}})
-                        logger.debug(f"已从{task_id}任务中删除{len(oldest_ids)}条旧记录")
+            # 按时间倒序跳过最新的max_size条，剩下的就是要删除的旧记录，
+            # 无需先count_documents
+            oldest = self.db.db[self.collection_name].find(
+                {"task_id": task_id},
+                {"_id": 1},
+                sort=[("processed_at", -1)],
+                skip=self.max_size
+            )
+            oldest_ids = [doc["_id"] for doc in oldest]
+            if oldest_ids:
+                # 批量删除
+                self.db.db[self.collection_name].delete_many({"_id": {"$in": oldest_ids}})
+                logger.debug(f"已从{task_id}任务中删除{len(oldest_ids)}条旧记录")
         except Exception as e:
             logger.error(f"修剪集合大小时出错: {str(e)}")
     
@@ -116,11 +217,19 @@ class DBUIDTracker:
         if uid is None or not task_id:
             return False
             
+        with self._seen_lock:
+            if uid in self._seen[task_id]:
+                self._seen[task_id].move_to_end(uid)
+                return True
+            
         try:
-            return self.db.db[self.collection_name].find_one({
-                "_id": uid,
-                "task_id": task_id
-            }) is not None
+            processed = self.db.db[self.collection_name].find_one(
+                {"_id": uid, "task_id": task_id},
+                {"_id": 1}
+            ) is not None
+            if processed:
+                self._remember([uid], task_id)
+            return processed
         except Exception as e:
             logger.error(f"检查UID是否处理时出错: {str(e)}")
             return False
@@ -143,21 +252,27 @@ class DBUIDTracker:
         if not uids:
             return []
             
+        # 缓存中已确认处理过的UID不再查询数据库
+        with self._seen_lock:
+            seen = self._seen[task_id]
+            unknown = [uid for uid in uids if uid not in seen]
+        if not unknown:
+            return []
+            
         try:
-            # 查找已处理的UID
-            processed_docs = list(self.db.db[self.collection_name].find(
-                {"_id": {"$in": uids}, "task_id": task_id},
-                {"_id": 1}
+            # 查找已处理的UID，distinct直接返回UID列表，无需解码文档
+            processed_uids = set(self.db.db[self.collection_name].distinct(
+                "_id",
+                {"_id": {"$in": unknown}, "task_id": task_id}
             ))
-            
-            # 提取已处理的UID
-            processed_uids = set(doc["_id"] for doc in processed_docs if "_id" in doc)
+            if processed_uids:
+                self._remember(list(processed_uids), task_id)
             
             # 返回未处理的UID
-            return [uid for uid in uids if uid not in processed_uids]
+            return [uid for uid in unknown if uid not in processed_uids]
         except Exception as e:
             logger.error(f"获取未处理UIDs时出错: {str(e)}")
-            return uids
+            return unknown
     
     def get_last_processed_uid(self, task_id: str) -> Optional[str]:
         """获取任务最后处理的UID
@@ -188,11 +303,18 @@ class DBUIDTracker:
         Args:
             task_id: 任务ID
         """
+        with self._seen_lock:
+            self._seen.pop(task_id, None)
         try:
             result = self.db.db[self.collection_name].delete_many({"task_id": task_id})
             logger.info(f"已清除任务{task_id}的{result.deleted_count}条记录")
         except Exception as e:
             logger.error(f"清除任务记录时出错: {str(e)}")
 
-# 全局实例，方便直接导入使用
-uid_tracker = DBUIDTracker()
+@functools.lru_cache(maxsize=1)
+def get_uid_tracker() -> DBUIDTracker:
+    """获取全局跟踪器实例
+    
+    实例在第一次使用时创建，导入本模块不会连接数据库
+    """
+    return DBUIDTracker()